@@ -1,21 +1,67 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+from cachetools import TTLCache
+import jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from database import get_db
+from sqlalchemy import bindparam, lambda_stmt, select, update
+from database import get_db, AsyncSessionLocal
 from models import AdminUser
 from config import settings
 
+logger = logging.getLogger("numberfetcher.auth")
+
+# JWT settings bound once at import; they are read on every request
+_SECRET_BYTES = settings.secret_key.encode("utf-8")
+_JWT_ALG = settings.jwt_algorithm
+_JWT_ALGS = [_JWT_ALG]
+_EXPIRE_DELTA = timedelta(minutes=settings.jwt_expire_minutes)
+
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=10,
+    bcrypt__ident="2b",
+    bcrypt__truncate_error=False
+)
+
+# Dedicated pool for bcrypt so hashing never blocks the event loop
+_hash_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bcrypt")
+
+# Caps concurrent bcrypt work on the login path; excess attempts wait here
+# instead of queueing unbounded work behind the hashing pool
+_login_slots = asyncio.Semaphore(4)
+
+# Cached statement for the active-user lookup shared by login and auth
+_active_user_by_username = lambda_stmt(
+    lambda: select(AdminUser).where(
+        AdminUser.username == bindparam("username"),
+        AdminUser.is_active == True
+    )
+)
 
 # JWT token security
 security = HTTPBearer()
 
+# Recently verified logins: HMAC(username, password) -> password hash it matched.
+# Only successful verifications are stored so brute-force attempts gain nothing.
+_verified_logins: TTLCache = TTLCache(maxsize=1024, ttl=30)
+
+# Strong references to in-flight login bookkeeping tasks
+_background_tasks: set = set()
+
+# Decoded bearer tokens: raw token -> (user id, username, exp timestamp)
+_token_cache: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -24,34 +70,93 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
+
+def _login_digest(username: str, password: str) -> str:
+    """Keyed digest of a credential pair, safe to keep in memory"""
+    message = f"{username}\0{password}".encode()
+    return hmac.new(_SECRET_BYTES, message, hashlib.sha256).hexdigest()
+
+async def _verify_cached(username: str, password: str, hashed_password: str) -> bool:
+    """Verify a password, skipping bcrypt for recently verified credentials"""
+    digest = _login_digest(username, password)
+    cached_hash = _verified_logins.get(digest)
+    if cached_hash is not None and hmac.compare_digest(cached_hash, hashed_password):
+        return True
+    
+    async with _login_slots:
+        if not await verify_password_async(password, hashed_password):
+            return False
+    
+    _verified_logins[digest] = hashed_password
+    return True
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.jwt_expire_minutes)
+        expire = datetime.utcnow() + _EXPIRE_DELTA
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.jwt_algorithm)
+    encoded_jwt = jwt.encode(to_encode, _SECRET_BYTES, algorithm=_JWT_ALG)
     return encoded_jwt
 
+async def _load_active_user(
+    db: AsyncSession, username: str, user_id: Optional[int] = None
+) -> Optional[AdminUser]:
+    """Load an active user, by primary key when the id is known"""
+    # Token "uid" claims and _token_cache entries supply the id on almost every request
+    if user_id is None:
+        result = await db.execute(_active_user_by_username, {"username": username})
+        return result.scalar_one_or_none()
+    
+    user = await db.get(AdminUser, user_id)
+    if user is None or user.username != username or not user.is_active:
+        return None
+    return user
+
+async def _record_login(user_id: int, password_hash: Optional[str] = None):
+    """Persist last_login, and an upgraded password hash, in its own session"""
+    values = {"last_login": datetime.utcnow()}
+    if password_hash:
+        values["password_hash"] = password_hash
+    
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(AdminUser).where(AdminUser.id == user_id).values(**values))
+            await db.commit()
+    except Exception:
+        # Runs as a detached task; nothing awaits it to surface the error
+        logger.exception("Failed to record login for user %s", user_id)
+
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[AdminUser]:
     """Authenticate user credentials"""
-    result = await db.execute(
-        select(AdminUser).where(
-            AdminUser.username == username,
-            AdminUser.is_active == True
-        )
-    )
+    result = await db.execute(_active_user_by_username, {"username": username})
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await _verify_cached(username, password, user.password_hash):
         return None
     
-    # Update last login
-    user.last_login = datetime.utcnow()
-    await db.commit()
+    # Upgrade hashes created with older bcrypt settings
+    new_hash = None
+    if pwd_context.needs_update(user.password_hash):
+        async with _login_slots:
+            new_hash = await get_password_hash_async(password)
+    
+    # Update last login off the request path
+    task = asyncio.create_task(_record_login(user.id, new_hash))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
     
     return user
 
@@ -66,27 +171,35 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            settings.secret_key, 
-            algorithms=[settings.jwt_algorithm]
-        )
-        username: str = payload.get("sub")
-        if username is None:
+    token = credentials.credentials
+    cached = _token_cache.get(token)
+    if cached is not None and cached[2] > time.time():
+        user_id, username, _ = cached
+        payload = None
+    else:
+        if cached is not None:
+            _token_cache.pop(token, None)
+        
+        try:
+            payload = jwt.decode(
+                token, 
+                _SECRET_BYTES, 
+                algorithms=_JWT_ALGS
+            )
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except jwt.PyJWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    result = await db.execute(
-        select(AdminUser).where(
-            AdminUser.username == username,
-            AdminUser.is_active == True
-        )
-    )
-    user = result.scalar_one_or_none()
+        
+        # Tokens issued before "uid" was added fall back to the username lookup
+        user_id = payload.get("uid")
     
+    user = await _load_active_user(db, username, user_id)
     if user is None:
         raise credentials_exception
     
+    if payload is not None and "exp" in payload:
+        _token_cache[token] = (user.id, username, payload["exp"])
+    
     return user
\ No newline at end of file
@@ -9,6 +9,7 @@ class Settings(BaseSettings):
     external_api_url: str = "https://itbd.online/api/sms/getnum"
     environment: str = "development"
     port: int = 8100
+    sql_echo: bool = False  # Log every SQL statement (slow; debugging only)
     
     # JWT settings
     jwt_algorithm: str = "HS256"
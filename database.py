@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
 from config import settings
 import asyncio
+import logging
 
 # Database engine
 if settings.database_url.startswith("sqlite"):
@@ -14,11 +16,32 @@ elif settings.database_url.startswith("postgresql://"):
 else:
     database_url = settings.database_url
 
+if database_url.startswith("sqlite"):
+    # SQLite serialises writers anyway; keep SQLAlchemy's default pool
+    engine_options = {"connect_args": {"check_same_thread": False}}
+else:
+    engine_options = {
+        "pool_size": 20,
+        "max_overflow": 20,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+        "pool_timeout": 10,
+    }
+    if database_url.startswith("postgresql+asyncpg"):
+        # Skip JIT planning for the short OLTP queries this app runs
+        engine_options["connect_args"] = {"server_settings": {"jit": "off"}}
+
 engine = create_async_engine(
     database_url,
-    echo=settings.environment == "development"
+    echo=settings.sql_echo,
+    **engine_options
 )
 
+logger = logging.getLogger("numberfetcher.db")
+
+if not settings.sql_echo:
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
 # Session factory
 AsyncSessionLocal = async_sessionmaker(
     engine, 
@@ -29,10 +52,53 @@ AsyncSessionLocal = async_sessionmaker(
 class Base(DeclarativeBase):
     metadata = MetaData()
 
+def dialect_insert(model):
+    """INSERT construct supporting ON CONFLICT clauses for the active backend"""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+def _duplicate_keys(sync_conn, table, index):
+    """Key values that occur more than once for the columns of index"""
+    query = (
+        select(*index.columns)
+        .group_by(*index.columns)
+        .having(func.count() > 1)
+    )
+    return [tuple(row) for row in sync_conn.execute(query)]
+
+def _create_missing_indexes(sync_conn):
+    """Add model indexes that create_all skips on tables that already exist"""
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        # Unique constraints are included; they are backed by an index too
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        existing.update(uc["name"] for uc in inspector.get_unique_constraints(table.name))
+        
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.unique:
+                # Never pick a survivor here; duplicates are for an operator to resolve
+                duplicates = _duplicate_keys(sync_conn, table, index)
+                if duplicates:
+                    logger.error(
+                        "Cannot create unique index %s on %s; duplicate keys %s: %s",
+                        index.name, table.name,
+                        tuple(column.name for column in index.columns), duplicates
+                    )
+                    raise RuntimeError(
+                        f"Duplicate rows in {table.name} block unique index {index.name}; "
+                        "remove them and restart"
+                    )
+            index.create(sync_conn)
+            logger.info("Created index %s on %s", index.name, table.name)
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
 
 async def get_db():
     """Dependency to get database session"""
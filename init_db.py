@@ -10,9 +10,9 @@ import os
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from database import init_db, AsyncSessionLocal
+from database import init_db, AsyncSessionLocal, engine, dialect_insert
 from models import AdminUser, NumberRange, Configuration, APIProfile
-from auth import get_password_hash
+from auth import get_password_hash_async
 from config import settings
 
 async def create_admin_user():
@@ -28,7 +28,7 @@ async def create_admin_user():
         if not existing_user:
             admin_user = AdminUser(
                 username=settings.admin_username,
-                password_hash=get_password_hash(settings.admin_password),
+                password_hash=await get_password_hash_async(settings.admin_password),
                 is_active=True
             )
             db.add(admin_user)
@@ -64,68 +64,31 @@ async def migrate_json_config():
                     )
                     db.add(config_obj)
             
-            # Migrate favorites
-            if "favourites" in config_data:
-                for fav in config_data["favourites"]:
-                    # Check if range already exists
-                    result = await db.execute(
-                        select(NumberRange).where(
-                            NumberRange.range_value == fav,
-                            NumberRange.category == "favorites"
-                        )
-                    )
-                    if not result.scalar_one_or_none():
-                        range_obj = NumberRange(
-                            range_value=fav,
-                            category="favorites",
-                            extra_data={
-                                "timestamp": config_data.get("favourites_timestamps", {}).get(fav),
-                                "migrated": True
-                            }
-                        )
-                        db.add(range_obj)
-            
-            # Migrate recents
-            if "recents" in config_data:
-                for recent in config_data["recents"]:
-                    # Check if range already exists
-                    result = await db.execute(
-                        select(NumberRange).where(
-                            NumberRange.range_value == recent,
-                            NumberRange.category == "recents"
-                        )
-                    )
-                    if not result.scalar_one_or_none():
-                        range_obj = NumberRange(
-                            range_value=recent,
-                            category="recents",
-                            extra_data={
-                                "timestamp": config_data.get("recents_timestamps", {}).get(recent),
-                                "migrated": True
-                            }
-                        )
-                        db.add(range_obj)
+            # Migrate favorites, recents and special; existing pairs are skipped
+            # by the (range_value, category) unique constraint
+            new_ranges = []
+            for source_key, category in (
+                ("favourites", "favorites"),
+                ("recents", "recents"),
+                ("special", "special")
+            ):
+                timestamps = config_data.get(f"{source_key}_timestamps", {})
+                for range_value in config_data.get(source_key, []):
+                    new_ranges.append({
+                        "range_value": range_value,
+                        "category": category,
+                        "extra_data": {
+                            "timestamp": timestamps.get(range_value),
+                            "migrated": True
+                        }
+                    })
             
-            # Migrate special
-            if "special" in config_data:
-                for special in config_data["special"]:
-                    # Check if range already exists
-                    result = await db.execute(
-                        select(NumberRange).where(
-                            NumberRange.range_value == special,
-                            NumberRange.category == "special"
-                        )
-                    )
-                    if not result.scalar_one_or_none():
-                        range_obj = NumberRange(
-                            range_value=special,
-                            category="special",
-                            extra_data={
-                                "timestamp": config_data.get("special_timestamps", {}).get(special),
-                                "migrated": True
-                            }
-                        )
-                        db.add(range_obj)
+            if new_ranges:
+                await db.execute(
+                    dialect_insert(NumberRange)
+                    .values(new_ranges)
+                    .on_conflict_do_nothing(index_elements=["range_value", "category"])
+                )
             
             # Save pause state
             result = await db.execute(
@@ -162,7 +125,7 @@ async def migrate_json_config():
 
 async def main():
     """Main initialization function"""
-    print("Initializing database...")
+    print(f"Initializing database {engine.url.render_as_string(hide_password=True)}...")
     
     # Create tables
     await init_db()
@@ -1,26 +1,32 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
 import os
 from database import init_db
 from routers import public, admin
-from middleware import logging_middleware
+from middleware import logging_middleware, start_request_logging, stop_request_logging
+from services.http_client import startup_http, shutdown_http
 from config import settings
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    log_listener, log_handler = start_request_logging()
+    await startup_http()
     yield
     # Shutdown
-    pass
+    await shutdown_http()
+    stop_request_logging(log_listener, log_handler)
 
 app = FastAPI(
     title="Number Fetcher API",
     description="Web version of Number Fetcher with admin authentication",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware - more permissive for local development
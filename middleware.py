@@ -1,26 +1,60 @@
 from fastapi import Request
 import time
 import os
-from datetime import datetime
+import sys
+import queue
+import logging
+import logging.handlers
+from typing import Tuple
+
+logger = logging.getLogger("numberfetcher.requests")
+
+# Monotonic clock for latency; immune to wall-clock adjustments
+_mono = time.monotonic
+
+# Probe endpoints hit by load balancers; not worth timing or logging
+_SKIP_PATHS = frozenset({"/", "/api/health"})
+
+def start_request_logging() -> Tuple[logging.handlers.QueueListener, logging.Handler]:
+    """Send request logs through a queue so a background thread does the I/O"""
+    log_queue = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    
+    listener.start()
+    return listener, queue_handler
+
+def stop_request_logging(listener: logging.handlers.QueueListener, queue_handler: logging.Handler):
+    """Detach the queue handler, then flush and stop its listener"""
+    logger.removeHandler(queue_handler)
+    listener.stop()
 
 async def logging_middleware(request: Request, call_next):
     """Request logging middleware - simplified for local development"""
-    start_time = time.time()
+    if request.url.path in _SKIP_PATHS:
+        return await call_next(request)
+    
+    start_time = _mono()
     
     response = await call_next(request)
     
-    process_time = int((time.time() - start_time) * 1000)
+    process_time = int((_mono() - start_time) * 1000)
     
     # Only log in development if needed, skip for production noise
     environment = os.getenv("ENVIRONMENT", "development")
     if environment == "development":
         # Minimal logging for development
         if process_time > 1000:  # Only log slow requests
-            print(f"{request.method} {request.url.path} - {response.status_code} - {process_time}ms")
+            logger.info("%s %s - %s - %sms", request.method, request.url.path, response.status_code, process_time)
     else:
         # Full logging for production
-        print(f"{datetime.utcnow().isoformat()} - "
-              f"{request.method} {request.url.path} - "
-              f"{response.status_code} - {process_time}ms")
+        logger.info("%s %s - %s - %sms", request.method, request.url.path, response.status_code, process_time)
     
     return response
\ No newline at end of file
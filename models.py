@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, Index, text
 from sqlalchemy.sql import func
 from database import Base
 from datetime import datetime
@@ -23,6 +23,11 @@ class NumberRange(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     extra_data = Column(JSON, nullable=True)  # Additional properties
+    
+    __table_args__ = (
+        Index("uq_range_value_category", "range_value", "category", unique=True),
+        Index("ix_number_ranges_category_updated_at", "category", "updated_at"),
+    )
 
 class Configuration(Base):
     __tablename__ = "configurations"
@@ -60,4 +65,14 @@ class APIProfile(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     last_login_attempt = Column(DateTime(timezone=True), nullable=True)
-    login_status = Column(String(50), default="not_attempted")  # not_attempted, success, failed
\ No newline at end of file
+    login_status = Column(String(50), default="not_attempted")  # not_attempted, success, failed
+    
+    __table_args__ = (
+        # Only the single active row is ever looked up by is_active
+        Index(
+            "ix_profile_active",
+            "is_active",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active")
+        ),
+    )
\ No newline at end of file
@@ -0,0 +1,50 @@
+import functools
+import inspect
+from typing import Any, Callable, Dict, Optional, Tuple
+from cachetools import TTLCache
+
+# One TTL store per prefix so each endpoint keeps its own expiry
+_stores: Dict[str, TTLCache] = {}
+
+def cached(
+    prefix: str,
+    ttl: int,
+    key_params: Tuple[str, ...] = (),
+    condition: Optional[Callable[[Any], bool]] = None,
+    maxsize: int = 128
+):
+    """Cache an async function's result in-process for ttl seconds.
+    
+    The cache key is the prefix plus the values of the arguments named in
+    key_params. Results are only stored when condition (if given) accepts them.
+    """
+    store = _stores.setdefault(prefix, TTLCache(maxsize=maxsize, ttl=ttl))
+    
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs).arguments
+            key = tuple(arguments.get(name) for name in key_params)
+            
+            try:
+                return store[key]
+            except KeyError:
+                pass
+            
+            value = await func(*args, **kwargs)
+            if condition is None or condition(value):
+                store[key] = value
+            return value
+        
+        return wrapper
+    
+    return decorator
+
+def invalidate(*prefixes: str):
+    """Drop every cached entry under the given prefixes"""
+    for prefix in prefixes:
+        store = _stores.get(prefix)
+        if store is not None:
+            store.clear()
\ No newline at end of file
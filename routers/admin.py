@@ -1,9 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import ORJSONResponse
+import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from typing import List
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
+from pydantic import TypeAdapter
 from datetime import timedelta
-from database import get_db
+from database import get_db, AsyncSessionLocal
 from models import AdminUser, NumberRange, Configuration, APIProfile
 from schemas import (
     AdminLogin, Token, NumberRange as NumberRangeSchema,
@@ -16,9 +20,18 @@ from services.external_api import ExternalAPIService
 from services.range_service import RangeService
 from services.timer_service import TimerService
 from services.profile_service import ProfileService
+from services.profile_cache import profile_cache
+from response_cache import cached, invalidate
 
 router = APIRouter()
 
+# Cached responses built from the active profile's upstream data
+_PROFILE_DEPENDENT_CACHES = ("dashboard", "balance", "test_numbers")
+
+# Bulk validators/serializers for the list endpoints
+_range_list_adapter = TypeAdapter(List[NumberRangeSchema])
+_profile_list_adapter = TypeAdapter(List[APIProfileSchema])
+
 @router.post("/login", response_model=Token)
 async def login(
     login_data: AdminLogin,
@@ -35,39 +48,72 @@ async def login(
     
     access_token_expires = timedelta(minutes=1440)  # 24 hours
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
+async def _run_in_session(operation):
+    """Run a service call on its own session so calls can proceed concurrently"""
+    async with AsyncSessionLocal() as session:
+        return await operation(session)
+
+async def _fetch_balance():
+    """Get the upstream balance without holding a DB connection during the call"""
+    api_config = await _run_in_session(
+        lambda session: ExternalAPIService(session).get_active_config()
+    )
+    return await ExternalAPIService().get_balance(config=api_config)
+
 @router.get("/dashboard", response_model=DashboardResponse)
+@cached("dashboard", ttl=15, condition=lambda data: "error" not in data.balance)
 async def get_dashboard(
-    current_user: AdminUser = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: AdminUser = Depends(get_current_user)
 ):
     """Get dashboard data"""
-    try:
-        # Get balance information using active profile
-        external_service = ExternalAPIService(db)
-        balance_data = await external_service.get_balance()
-        
-        # Get number ranges
-        range_service = RangeService(db)
-        ranges = await range_service.get_ranges_by_category()
-        
-        # Get timer status
-        timer_service = TimerService(db)
-        timer_status = await timer_service.get_status()
-        
-        return DashboardResponse(
-            status="running",
-            balance=balance_data if balance_data.get("success") else {"error": "Failed to fetch balance"},
-            ranges=ranges,
-            timer_status=timer_status
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Balance (external HTTP), ranges and timer status are independent;
+    # each gets its own session because one AsyncSession can't be shared
+    balance_data, ranges, timer_status = await asyncio.gather(
+        _fetch_balance(),
+        _run_in_session(lambda session: RangeService(session).get_ranges_by_category()),
+        _run_in_session(lambda session: TimerService(session).get_status()),
+        return_exceptions=True
+    )
+    
+    if isinstance(ranges, Exception):
+        raise HTTPException(status_code=500, detail=str(ranges))
+    
+    if isinstance(balance_data, Exception) or not balance_data.get("success"):
+        balance_data = {"error": "Failed to fetch balance"}
+    
+    if isinstance(timer_status, Exception):
+        timer_status = {"error": str(timer_status)}
+    
+    return DashboardResponse(
+        status="running",
+        balance=balance_data,
+        ranges=ranges,
+        timer_status=timer_status
+    )
+
+@cached("ranges", ttl=300, key_params=("category",))
+async def _list_ranges(db: AsyncSession, category: Optional[str]) -> list:
+    """Load ranges as JSON-ready dicts, newest first"""
+    # Plain column rows validate straight into the schema without ORM hydration
+    query = select(
+        NumberRange.id,
+        NumberRange.range_value,
+        NumberRange.category,
+        NumberRange.created_at,
+        NumberRange.updated_at,
+        NumberRange.extra_data
+    )
+    if category:
+        query = query.where(NumberRange.category == category)
+    
+    result = await db.execute(query.order_by(NumberRange.updated_at.desc()))
+    ranges = _range_list_adapter.validate_python(result.mappings().all())
+    return _range_list_adapter.dump_python(ranges, mode="json")
 
 @router.get("/ranges", response_model=List[NumberRangeSchema])
 async def get_ranges(
@@ -76,14 +122,8 @@ async def get_ranges(
     db: AsyncSession = Depends(get_db)
 ):
     """Get number ranges"""
-    query = select(NumberRange)
-    if category:
-        query = query.where(NumberRange.category == category)
-    
-    result = await db.execute(query.order_by(NumberRange.updated_at.desc()))
-    ranges = result.scalars().all()
-    
-    return ranges
+    # Returning the response directly skips FastAPI's per-item re-validation
+    return ORJSONResponse(await _list_ranges(db, category))
 
 @router.post("/ranges", response_model=NumberRangeSchema)
 async def create_range(
@@ -92,27 +132,28 @@ async def create_range(
     db: AsyncSession = Depends(get_db)
 ):
     """Create new number range"""
-    # Check if range already exists in this category
-    existing = await db.execute(
-        select(NumberRange).where(
-            NumberRange.range_value == range_data.range_value,
-            NumberRange.category == range_data.category
-        )
-    )
+    db_range = await RangeService(db).insert_range(**range_data.model_dump())
     
-    if existing.scalar_one_or_none():
+    if not db_range:
         raise HTTPException(
             status_code=400,
             detail="Range already exists in this category"
         )
     
-    db_range = NumberRange(**range_data.dict())
-    db.add(db_range)
     await db.commit()
-    await db.refresh(db_range)
+    invalidate("ranges", "dashboard")
     
     return db_range
 
+def _is_range_conflict(exc: IntegrityError) -> bool:
+    """Whether exc is a uq_range_value_category violation"""
+    message = str(exc.orig)
+    # PostgreSQL names the index; SQLite lists the indexed columns instead
+    return (
+        "uq_range_value_category" in message
+        or "number_ranges.range_value, number_ranges.category" in message
+    )
+
 @router.put("/ranges/{range_id}", response_model=NumberRangeSchema)
 async def update_range(
     range_id: int,
@@ -121,20 +162,38 @@ async def update_range(
     db: AsyncSession = Depends(get_db)
 ):
     """Update number range"""
-    result = await db.execute(
-        select(NumberRange).where(NumberRange.id == range_id)
-    )
+    update_data = range_data.model_dump(exclude_unset=True)
+    for field in ("range_value", "category"):
+        if field in update_data and update_data[field] is None:
+            raise HTTPException(status_code=422, detail=f"{field} cannot be null")
+    
+    if update_data:
+        query = (
+            update(NumberRange)
+            .where(NumberRange.id == range_id)
+            .values(**update_data)
+            .returning(NumberRange)
+        )
+    else:
+        query = select(NumberRange).where(NumberRange.id == range_id)
+    
+    try:
+        result = await db.execute(query)
+    except IntegrityError as e:
+        await db.rollback()
+        if not _is_range_conflict(e):
+            raise
+        raise HTTPException(
+            status_code=400,
+            detail="Range already exists in this category"
+        )
     db_range = result.scalar_one_or_none()
     
     if not db_range:
         raise HTTPException(status_code=404, detail="Range not found")
     
-    update_data = range_data.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_range, field, value)
-    
     await db.commit()
-    await db.refresh(db_range)
+    invalidate("ranges", "dashboard")
     
     return db_range
 
@@ -153,9 +212,11 @@ async def delete_range(
         raise HTTPException(status_code=404, detail="Range not found")
     
     await db.commit()
+    invalidate("ranges", "dashboard")
     return {"message": "Range deleted successfully"}
 
 @router.get("/balance")
+@cached("balance", ttl=30, condition=lambda data: data.get("success"))
 async def get_balance(
     current_user: AdminUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
@@ -171,6 +232,7 @@ async def get_balance(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/test-numbers")
+@cached("test_numbers", ttl=60, condition=lambda data: data.get("success"))
 async def get_test_numbers(
     current_user: AdminUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
@@ -195,6 +257,7 @@ async def start_timer(
     """Start automation timer"""
     timer_service = TimerService(db)
     result = await timer_service.start_timer(category, interval_minutes)
+    invalidate("dashboard")
     return result
 
 @router.post("/timer/stop")
@@ -206,6 +269,7 @@ async def stop_timer(
     """Stop automation timer"""
     timer_service = TimerService(db)
     result = await timer_service.stop_timer(category)
+    invalidate("dashboard")
     return result
 
 # Profile Management Endpoints
@@ -218,7 +282,9 @@ async def get_profiles(
     """Get all API profiles"""
     profile_service = ProfileService(db)
     profiles = await profile_service.get_all_profiles()
-    return profiles
+    
+    profiles = _profile_list_adapter.validate_python(profiles, from_attributes=True)
+    return ORJSONResponse(_profile_list_adapter.dump_python(profiles, mode="json"))
 
 @router.post("/profiles")
 async def create_profile(
@@ -232,6 +298,7 @@ async def create_profile(
         name=profile_data.name,
         auth_token=profile_data.auth_token
     )
+    invalidate(*_PROFILE_DEPENDENT_CACHES)
     
     return {
         "profile": profile,
@@ -247,30 +314,44 @@ async def update_profile(
     db: AsyncSession = Depends(get_db)
 ):
     """Update API profile with auto-login"""
-    result = await db.execute(
-        select(APIProfile).where(APIProfile.id == profile_id)
-    )
+    update_data = profile_data.model_dump(exclude_unset=True)
+    auth_token_changed = False
+    
+    # Only a token change needs the old value, to decide on auto-login
+    if "auth_token" in update_data:
+        result = await db.execute(
+            select(APIProfile.auth_token).where(APIProfile.id == profile_id)
+        )
+        current_token = result.scalar_one_or_none()
+        if current_token is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        auth_token_changed = current_token != update_data["auth_token"]
+    
+    if update_data:
+        query = (
+            update(APIProfile)
+            .where(APIProfile.id == profile_id)
+            .values(**update_data)
+            .returning(APIProfile)
+        )
+    else:
+        query = select(APIProfile).where(APIProfile.id == profile_id)
+    
+    result = await db.execute(query)
     profile = result.scalar_one_or_none()
     
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    update_data = profile_data.dict(exclude_unset=True)
-    auth_token_changed = False
-    
-    for field, value in update_data.items():
-        if field == "auth_token" and getattr(profile, field) != value:
-            auth_token_changed = True
-        setattr(profile, field, value)
-    
     await db.commit()
-    await db.refresh(profile)
+    profile_cache.invalidate()
     
     # Auto-login if auth token was changed
     login_result = None
     if auth_token_changed:
         profile_service = ProfileService(db)
         login_result = await profile_service.login_profile(profile_id)
+    invalidate(*_PROFILE_DEPENDENT_CACHES)
     
     return {
         "profile": profile,
@@ -291,6 +372,7 @@ async def delete_profile(
     if not success:
         raise HTTPException(status_code=404, detail="Profile not found")
     
+    invalidate(*_PROFILE_DEPENDENT_CACHES)
     return {"message": "Profile deleted successfully"}
 
 @router.post("/profiles/{profile_id}/activate")
@@ -306,6 +388,7 @@ async def activate_profile(
     if not success:
         raise HTTPException(status_code=404, detail="Profile not found")
     
+    invalidate(*_PROFILE_DEPENDENT_CACHES)
     return {"message": "Profile activated successfully"}
 
 @router.post("/profiles/{profile_id}/login", response_model=ProfileLoginResponse)
@@ -317,6 +400,7 @@ async def login_profile(
     """Attempt to login with a profile's auth token"""
     profile_service = ProfileService(db)
     result = await profile_service.login_profile(profile_id)
+    invalidate(*_PROFILE_DEPENDENT_CACHES)
     return result
 
 @router.get("/profiles/active", response_model=APIProfileSchema)
@@ -1,17 +1,50 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
-from fastapi.responses import Response
+from fastapi.responses import ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import httpx
-import json
+import orjson
 from datetime import datetime
-from database import get_db
+from typing import Optional
+from cachetools import TTLCache
+from database import get_db, AsyncSessionLocal
 from models import Configuration
 from schemas import FetchNumberResponse, HealthResponse
 from services.external_api import ExternalAPIService
 
 router = APIRouter()
 
+# The paused flag rarely changes; keep it briefly in-process.
+# Call config_cache.clear() after writing it.
+config_cache: TTLCache = TTLCache(maxsize=16, ttl=5)
+
+async def _is_paused(db: AsyncSession) -> bool:
+    """Get the paused flag, from cache when fresh"""
+    paused = config_cache.get("paused")
+    if paused is not None:
+        return paused
+    
+    result = await db.execute(
+        select(Configuration.value).where(Configuration.key == "paused")
+    )
+    value = result.scalar_one_or_none() or {}
+    paused = bool(value.get("paused", False))
+    config_cache["paused"] = paused
+    return paused
+
+async def _fetch_upstream(
+    number_range: Optional[str] = None, check_paused: bool = False
+) -> Optional[httpx.Response]:
+    """Call the upstream getnum API; returns None if paused and check_paused is set"""
+    # Read everything the call needs, then release the DB connection before
+    # the upstream request so slow upstream replies don't pin pool slots
+    async with AsyncSessionLocal() as db:
+        if check_paused and await _is_paused(db):
+            return None
+        api_config = await ExternalAPIService(db).get_active_config()
+    
+    return await ExternalAPIService().fetch_number(number_range, config=api_config)
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check(db: AsyncSession = Depends(get_db)):
     """Health check endpoint"""
@@ -30,52 +63,13 @@ async def health_check(db: AsyncSession = Depends(get_db)):
 
 @router.get("/fetch-number")
 async def fetch_number(
-    request: Request,
-    db: AsyncSession = Depends(get_db)
+    request: Request
 ):
     """Fetch number with default configuration"""
     try:
-        # Get current configuration from database
-        config_result = await db.execute(
-            select(Configuration).where(Configuration.key == "current_config")
-        )
-        config_row = config_result.scalar_one_or_none()
-        
-        if not config_row:
-            # Use default configuration
-            default_config = {
-                "url": "https://itbd.online/api/sms/getnum",
-                "headers": {
-                    "accept": "*/*",
-                    "accept-language": "en-US,en;q=0.5",
-                    "content-type": "application/json",
-                    "origin": "https://itbd.online",
-                    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                },
-                "cookies": {},
-                "data": {
-                    "app": "null",
-                    "carrier": "null",
-                    "numberRange": "24996218XXXX",
-                    "national": False,
-                    "removePlus": False
-                }
-            }
-        else:
-            default_config = config_row.value
-        
-        # Check if paused
-        pause_result = await db.execute(
-            select(Configuration).where(Configuration.key == "paused")
-        )
-        pause_row = pause_result.scalar_one_or_none()
-        
-        if pause_row and pause_row.value.get("paused", False):
-            return {"error": "Server is paused"}
-        
-        # Make external API call
-        external_service = ExternalAPIService(db)
-        response = await external_service.fetch_number()
+        response = await _fetch_upstream(check_paused=True)
+        if response is None:
+            return ORJSONResponse({"error": "Server is paused"}, status_code=503)
         
         # Convert 429 (rate limit) to 503 (service unavailable) to avoid rate limit issues
         status_code = response.status_code
@@ -83,10 +77,10 @@ async def fetch_number(
             status_code = 503
             # Optionally modify the response content
             try:
-                content = json.loads(response.content)
+                content = orjson.loads(response.content)
                 if isinstance(content, dict) and "error" in content:
                     content["error"] = "External service temporarily unavailable"
-                    response_content = json.dumps(content).encode()
+                    response_content = orjson.dumps(content)
                 else:
                     response_content = response.content
             except:
@@ -106,46 +100,11 @@ async def fetch_number(
 @router.get("/fetch-number/range/{number_range}")
 async def fetch_number_with_range(
     number_range: str,
-    request: Request,
-    db: AsyncSession = Depends(get_db)
+    request: Request
 ):
     """Fetch number with specific range"""
     try:
-        # Get current configuration from database
-        config_result = await db.execute(
-            select(Configuration).where(Configuration.key == "current_config")
-        )
-        config_row = config_result.scalar_one_or_none()
-        
-        if not config_row:
-            # Use default configuration
-            config = {
-                "url": "https://itbd.online/api/sms/getnum",
-                "headers": {
-                    "accept": "*/*",
-                    "accept-language": "en-US,en;q=0.5",
-                    "content-type": "application/json",
-                    "origin": "https://itbd.online",
-                    "referer": f"https://itbd.online/user_report_1?getfrange={number_range}",
-                    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                },
-                "cookies": {},
-                "data": {
-                    "app": "null",
-                    "carrier": "null",
-                    "numberRange": number_range,
-                    "national": False,
-                    "removePlus": False
-                }
-            }
-        else:
-            config = config_row.value.copy()
-            config["data"]["numberRange"] = number_range
-            config["headers"]["referer"] = f"https://itbd.online/user_report_1?getfrange={number_range}"
-        
-        # Make external API call
-        external_service = ExternalAPIService(db)
-        response = await external_service.fetch_number(number_range)
+        response = await _fetch_upstream(number_range)
         
         # Convert 429 (rate limit) to 503 (service unavailable) to avoid rate limit issues
         status_code = response.status_code
@@ -153,10 +112,10 @@ async def fetch_number_with_range(
             status_code = 503
             # Optionally modify the response content
             try:
-                content = json.loads(response.content)
+                content = orjson.loads(response.content)
                 if isinstance(content, dict) and "error" in content:
                     content["error"] = "External service temporarily unavailable"
-                    response_content = json.dumps(content).encode()
+                    response_content = orjson.dumps(content)
                 else:
                     response_content = response.content
             except:
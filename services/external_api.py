@@ -1,14 +1,108 @@
+import heapq
 import httpx
-from typing import Dict, Any, Optional
+import orjson
+from typing import Dict, Any, Optional, Tuple
 from config import settings
 from services.profile_service import ProfileService
+from services.http_client import get_http_client
 from sqlalchemy.ext.asyncio import AsyncSession
 
+_GETNUM_URL = "https://itbd.online/api/sms/getnum"
+
+# Shared request headers/cookies; treat as read-only and merge per-call overrides
+_BASE_HEADERS = {
+    "accept": "*/*",
+    "accept-language": "en-US,en;q=0.5",
+    "content-type": "application/json",
+    "priority": "u=1, i",
+    "sec-ch-ua": '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-origin",
+    "sessionauth": "null",
+    "x-requested-with": "XMLHttpRequest",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
+}
+
+_BASE_COOKIES = {
+    "_ga": "GA1.1.1292367769.1753396403",
+    "_ga_9MJB2R4JD4": "GS2.1.s1755023001$o165$g1$t1755032375$j58$l0$h0",
+    "popupShown1xp0": "true",
+    "TawkConnectionTime": "0",
+    "twk_uuid_681787a55d55ef191a9da720": "%7B%22uuid%22%3A%221.70idSn3nmozSQySpwWZsUBKHN9HIngJkFJUlhqcEbMykn4uA5YhFGIFUxYVqfI4pWLuL2MONdB0MJbUMr4gXWsdKMtD4klrsZWhsGcSG0CmXdpS7bY9g%22%2C%22version%22%3A3%2C%22domain%22%3A%22itbd.online%22%2C%22ts%22%3A1755034699570%7D"
+}
+
+_FALLBACK_HEADERS = {
+    "accept": "*/*",
+    "accept-language": "en-US,en;q=0.5",
+    "content-type": "application/json",
+    "origin": "https://itbd.online",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Per-endpoint header overrides merged over the profile headers
+_ACCESS_LIST_OVERRIDES = {
+    "accept": "application/json, text/javascript, */*; q=0.01",
+    "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "referer": "https://itbd.online/source-idea",
+    "x-requested-with": "XMLHttpRequest"
+}
+
+_BALANCE_OVERRIDES = {
+    "referer": "https://itbd.online/summary",
+    "userrate": "0.007"
+}
+
+# Endpoint header sets merged once at import for both base header sets
+_ACCESS_LIST_HEADERS = {**_BASE_HEADERS, **_ACCESS_LIST_OVERRIDES}
+_BALANCE_HEADERS = {**_BASE_HEADERS, **_BALANCE_OVERRIDES}
+_FALLBACK_ACCESS_LIST_HEADERS = {**_FALLBACK_HEADERS, **_ACCESS_LIST_OVERRIDES}
+_FALLBACK_BALANCE_HEADERS = {**_FALLBACK_HEADERS, **_BALANCE_OVERRIDES}
+
+# Shared config used when no logged-in profile is active; callers must not mutate it
+_FALLBACK_CONFIG = {
+    "url": _GETNUM_URL,
+    "headers": _FALLBACK_HEADERS,
+    "access_list_headers": _FALLBACK_ACCESS_LIST_HEADERS,
+    "balance_headers": _FALLBACK_BALANCE_HEADERS,
+    "cookies": {}
+}
+
+# getnum body fields that never change; numberRange is filled in per call
+_FETCH_NUMBER_BASE = {
+    "app": "null",
+    "carrier": "null",
+    "numberRange": None,
+    "national": False,
+    "removePlus": False
+}
+
+_ACCESS_LIST_BODY = b"prefix=&source=&keyword=chatgpt"
+
+# Last access-list body built, as (auth_token, body); the active token rarely changes
+_last_access_list_body: Optional[Tuple[str, bytes]] = None
+
+def _access_list_body(auth_token: Optional[str]) -> bytes:
+    """Build the access-list form body, reusing it while the token is unchanged"""
+    global _last_access_list_body
+    if auth_token is None:
+        return _ACCESS_LIST_BODY
+    
+    cached = _last_access_list_body
+    if cached is not None and cached[0] == auth_token:
+        return cached[1]
+    
+    body = _ACCESS_LIST_BODY + b"&authToken=" + auth_token.encode()
+    _last_access_list_body = (auth_token, body)
+    return body
+
 class ExternalAPIService:
     """Service for handling external API calls"""
     
     def __init__(self, db: Optional[AsyncSession] = None):
-        self.timeout = 10
+        self.client = get_http_client()
         self.db = db
     
     async def get_active_config(self) -> Optional[Dict[str, Any]]:
@@ -20,194 +114,143 @@ class ExternalAPIService:
             if profile_config:
                 # Use the exact headers and cookies from your working fetch request
                 return {
-                    "url": "https://itbd.online/api/sms/getnum",
-                    "headers": {
-                        "accept": "*/*",
-                        "accept-language": "en-US,en;q=0.5",
-                        "content-type": "application/json",
-                        "priority": "u=1, i",
-                        "sec-ch-ua": '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
-                        "sec-ch-ua-mobile": "?0",
-                        "sec-ch-ua-platform": '"Windows"',
-                        "sec-fetch-dest": "empty",
-                        "sec-fetch-mode": "cors",
-                        "sec-fetch-site": "same-origin",
-                        "sessionauth": "null",
-                        "x-requested-with": "XMLHttpRequest",
-                        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
-                    },
+                    "url": _GETNUM_URL,
+                    "headers": _BASE_HEADERS,
+                    "access_list_headers": _ACCESS_LIST_HEADERS,
+                    "balance_headers": _BALANCE_HEADERS,
                     "cookies": {
-                        "_ga": "GA1.1.1292367769.1753396403",
-                        "sessionAuth": profile_config["session_token"],  # Use the session token from login response
-                        "_ga_9MJB2R4JD4": "GS2.1.s1755023001$o165$g1$t1755032375$j58$l0$h0",
-                        "popupShown1xp0": "true",
-                        "TawkConnectionTime": "0",
-                        "twk_uuid_681787a55d55ef191a9da720": "%7B%22uuid%22%3A%221.70idSn3nmozSQySpwWZsUBKHN9HIngJkFJUlhqcEbMykn4uA5YhFGIFUxYVqfI4pWLuL2MONdB0MJbUMr4gXWsdKMtD4klrsZWhsGcSG0CmXdpS7bY9g%22%2C%22version%22%3A3%2C%22domain%22%3A%22itbd.online%22%2C%22ts%22%3A1755034699570%7D"
+                        **_BASE_COOKIES,
+                        "sessionAuth": profile_config["session_token"]  # Use the session token from login response
                     },
                     "auth_token": profile_config["auth_token"],
                     "session_token": profile_config["session_token"]
                 }
         
         # Fallback to default configuration (no auth token)
-        return {
-            "url": "https://itbd.online/api/sms/getnum",
-            "headers": {
-                "accept": "*/*",
-                "accept-language": "en-US,en;q=0.5",
-                "content-type": "application/json",
-                "origin": "https://itbd.online",
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
-            "cookies": {}
-        }
+        return _FALLBACK_CONFIG
 
-    async def fetch_number(self, number_range: str = None) -> httpx.Response:
+    async def fetch_number(
+        self, number_range: str = None, config: Optional[Dict[str, Any]] = None
+    ) -> httpx.Response:
         """Make external API call to fetch number using active profile's auth token"""
-        config = await self.get_active_config()
+        if config is None:
+            config = await self.get_active_config()
         
-        data = {
-            "app": "null",
-            "carrier": "null", 
-            "numberRange": number_range or "24996218XXXX",
-            "national": False,
-            "removePlus": False
-        }
+        # Overriding the placeholder keeps numberRange in its original position
+        data = {**_FETCH_NUMBER_BASE, "numberRange": number_range or "24996218XXXX"}
         
         # DO NOT add authToken to JSON body - it should be in cookies as sessionAuth
         
         # Update referer with the number range
-        headers = config["headers"].copy()
         if number_range:
-            headers["referer"] = f"https://itbd.online/user_report_1?getfrange={number_range}"
+            referer = f"https://itbd.online/user_report_1?getfrange={number_range}"
         else:
-            headers["referer"] = "https://itbd.online/user_report_1"
+            referer = "https://itbd.online/user_report_1"
+        headers = {**config["headers"], "referer": referer}
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                config["url"],
-                headers=headers,
-                cookies=config.get("cookies", {}),
-                json=data
-            )
-            return response
+        response = await self.client.post(
+            config["url"],
+            headers=headers,
+            cookies=config.get("cookies", {}),
+            content=orjson.dumps(data)
+        )
+        return response
     
-    async def get_access_list(self) -> Dict[str, Any]:
+    async def get_access_list(self, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get latest test numbers from source-idea endpoint"""
         try:
-            config = await self.get_active_config()
+            if config is None:
+                config = await self.get_active_config()
             url = "https://itbd.online/api/source-idea?action=get_access_list"
             
-            headers = config["headers"].copy()
-            headers.update({
-                "accept": "application/json, text/javascript, */*; q=0.01",
-                "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-                "referer": "https://itbd.online/source-idea",
-                "x-requested-with": "XMLHttpRequest"
-            })
-            
-            data = "prefix=&source=&keyword=chatgpt"
+            headers = config.get("access_list_headers") or {**config["headers"], **_ACCESS_LIST_OVERRIDES}
             
             # Add auth token if available from active profile
-            if "auth_token" in config:
-                data += f"&authToken={config['auth_token']}"
+            data = _access_list_body(config.get("auth_token"))
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    url,
-                    headers=headers,
-                    cookies=config.get("cookies", {}),
-                    data=data
-                )
-                
-                if response.status_code == 200:
-                    response_data = response.json()
-                    if response_data.get("success") and "results" in response_data:
-                        results = response_data["results"]
-                        
-                        # Sort by datetime (newest first)
-                        try:
-                            from datetime import datetime as dt
-                            results.sort(
-                                key=lambda x: dt.strptime(
-                                    x.get("Datetime", "1900-01-01 00:00:00"), 
-                                    "%Y-%m-%d %H:%M:%S"
-                                ), 
-                                reverse=True
-                            )
-                        except Exception:
-                            pass
-                        
-                        # Filter working numbers
-                        working_numbers = []
-                        for result in results:
-                            test_number = result.get("Test number", "").strip()
-                            if test_number:
-                                working_numbers.append({
-                                    "test_number": test_number,
-                                    "comment": result.get("Comment", ""),
-                                    "datetime": result.get("Datetime", ""),
-                                    "rate": result.get("Rate", ""),
-                                    "currency": result.get("Currency", "")
-                                })
-                        
-                        # Take only the latest 10
-                        working_numbers = working_numbers[:10]
-                        
-                        return {
-                            "success": True,
-                            "working_numbers": working_numbers,
-                            "total_results": len(response_data["results"])
+            response = await self.client.post(
+                url,
+                headers=headers,
+                cookies=config.get("cookies", {}),
+                content=data
+            )
+            
+            if response.status_code == 200:
+                response_data = orjson.loads(response.content)
+                if response_data.get("success") and "results" in response_data:
+                    results = response_data["results"]
+                    
+                    # Latest 10 numbers with a test number; "YYYY-MM-DD HH:MM:SS" sorts as a string
+                    latest = heapq.nlargest(
+                        10,
+                        (r for r in results if r.get("Test number", "").strip()),
+                        key=lambda r: r.get("Datetime") or ""
+                    )
+                    
+                    working_numbers = [
+                        {
+                            "test_number": result["Test number"].strip(),
+                            "comment": result.get("Comment", ""),
+                            "datetime": result.get("Datetime") or "",
+                            "rate": result.get("Rate", ""),
+                            "currency": result.get("Currency", "")
                         }
-                    else:
-                        return {"success": False, "error": "Invalid response format"}
-                else:
-                    return {"success": False, "error": f"HTTP {response.status_code}"}
+                        for result in latest
+                    ]
                     
+                    return {
+                        "success": True,
+                        "working_numbers": working_numbers,
+                        "total_results": len(response_data["results"])
+                    }
+                else:
+                    return {"success": False, "error": "Invalid response format"}
+            else:
+                return {"success": False, "error": f"HTTP {response.status_code}"}
+                
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    async def get_balance(self) -> Dict[str, Any]:
+    async def get_balance(self, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get balance information from user summary endpoint"""
         try:
-            config = await self.get_active_config()
+            if config is None:
+                config = await self.get_active_config()
             url = "https://itbd.online/api/user/summary/29"
             
-            headers = config["headers"].copy()
-            headers.update({
-                "referer": "https://itbd.online/summary",
-                "userrate": "0.007"
-            })
+            headers = config.get("balance_headers") or {**config["headers"], **_BALANCE_OVERRIDES}
             
             # Add auth token if available from active profile
             if "auth_token" in config:
                 # For balance API, we might need to add the token differently
                 # Let's try adding it as a parameter or header based on the API requirements
-                headers["authToken"] = config["auth_token"]
+                headers = {**headers, "authToken": config["auth_token"]}
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    url,
-                    headers=headers,
-                    cookies=config.get("cookies", {})
-                )
-                
-                if response.status_code == 200:
-                    balance_data = response.json()
-                    if isinstance(balance_data, list) and len(balance_data) > 0:
-                        today_data = balance_data[0]
-                        total_balance = sum(item.get("amount", 0) for item in balance_data)
-                        
-                        return {
-                            "success": True,
-                            "today_balance": today_data.get("amount", 0),
-                            "today_otp": today_data.get("otp", 0),
-                            "today_date": today_data.get("date", ""),
-                            "total_balance": round(total_balance, 3)
-                        }
-                    else:
-                        return {"success": False, "error": "No balance data available"}
-                else:
-                    return {"success": False, "error": f"HTTP {response.status_code}"}
+            response = await self.client.get(
+                url,
+                headers=headers,
+                cookies=config.get("cookies", {})
+            )
+            
+            if response.status_code == 200:
+                balance_data = orjson.loads(response.content)
+                if isinstance(balance_data, list) and len(balance_data) > 0:
+                    today_data = balance_data[0]
+                    total_balance = 0
+                    for item in balance_data:
+                        total_balance += item.get("amount") or 0
                     
+                    return {
+                        "success": True,
+                        "today_balance": today_data.get("amount", 0),
+                        "today_otp": today_data.get("otp", 0),
+                        "today_date": today_data.get("date", ""),
+                        "total_balance": round(total_balance, 3)
+                    }
+                else:
+                    return {"success": False, "error": "No balance data available"}
+            else:
+                return {"success": False, "error": f"HTTP {response.status_code}"}
+                
         except Exception as e:
             return {"success": False, "error": str(e)}
\ No newline at end of file
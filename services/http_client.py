@@ -0,0 +1,35 @@
+import httpx
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Optional
+
+# Shared outbound client so calls to itbd.online reuse pooled connections
+_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=2.0),
+            # All calls go to one host; HTTP/2 multiplexes them over a single connection
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=20, max_connections=100, keepalive_expiry=60
+            ),
+            # Upstream endpoints answer directly; a redirect means a broken session
+            follow_redirects=False,
+            # Never keep Set-Cookie between calls; each request sends its own cookies
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        )
+    return _client
+
+async def startup_http():
+    """Open the shared HTTP client"""
+    get_http_client()
+
+async def shutdown_http():
+    """Close the shared HTTP client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
\ No newline at end of file
@@ -0,0 +1,44 @@
+import asyncio
+import time
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+class ProfileCache:
+    """Process-wide cache of the active profile's API configuration"""
+    
+    def __init__(self, ttl: float = 30):
+        self.ttl = ttl
+        self._config: Optional[Mapping[str, Any]] = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+    
+    async def get(
+        self, loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Mapping[str, Any]]:
+        """Get the cached config, loading it with loader() when stale"""
+        if time.monotonic() < self._expires_at:
+            return self._config
+        
+        # One loader at a time; waiters pick up the freshly stored value
+        async with self._lock:
+            if time.monotonic() < self._expires_at:
+                return self._config
+            
+            generation = self._generation
+            config = await loader()
+            frozen = MappingProxyType(config) if config is not None else None
+            
+            # Skip storing if a profile write invalidated the cache mid-load
+            if generation == self._generation:
+                self._config = frozen
+                self._expires_at = time.monotonic() + self.ttl
+            return frozen
+    
+    def invalidate(self):
+        """Drop the cached config; call after any profile write"""
+        self._generation += 1
+        self._config = None
+        self._expires_at = 0.0
+
+profile_cache = ProfileCache()
\ No newline at end of file
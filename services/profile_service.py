@@ -1,9 +1,20 @@
 import httpx
+import orjson
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import aliased
 from models import APIProfile
-from typing import Dict, Any, Optional
+from services.http_client import get_http_client
+from services.profile_cache import profile_cache
+from typing import Dict, Any, Mapping, Optional
+
+# Upper bound on upstream body bytes echoed back in login errors
+_MAX_ERROR_BODY = 2048
+
+def _body_excerpt(response: httpx.Response) -> str:
+    """Decode at most _MAX_ERROR_BODY bytes of a response body"""
+    return response.content[:_MAX_ERROR_BODY].decode("utf-8", "replace")
 
 class ProfileService:
     """Service for managing API profiles and external login"""
@@ -11,7 +22,7 @@ class ProfileService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.login_url = "https://itbd.online/api/login"
-        self.timeout = 10
+        self.client = get_http_client()
     
     async def create_profile(self, name: str, auth_token: str) -> tuple[APIProfile, dict]:
         """Create a new API profile and auto-login"""
@@ -28,6 +39,7 @@ class ProfileService:
         
         self.db.add(profile)
         await self.db.commit()
+        profile_cache.invalidate()
         await self.db.refresh(profile)
         
         # Auto-login the new profile
@@ -49,38 +61,35 @@ class ProfileService:
     
     async def activate_profile(self, profile_id: int) -> bool:
         """Activate a specific profile and deactivate others"""
-        # Deactivate all profiles
-        await self.deactivate_all_profiles()
-        
-        # Activate the selected profile
+        # One statement flips every row; the EXISTS guard leaves all profiles
+        # untouched when the target id does not exist
+        target = aliased(APIProfile)
         result = await self.db.execute(
-            select(APIProfile).where(APIProfile.id == profile_id)
+            update(APIProfile)
+            .where(select(target.id).where(target.id == profile_id).exists())
+            .values(is_active=(APIProfile.id == profile_id))
+            .execution_options(synchronize_session=False)
         )
-        profile = result.scalar_one_or_none()
-        
-        if profile:
-            profile.is_active = True
-            await self.db.commit()
-            return True
+        await self.db.commit()
+        profile_cache.invalidate()
         
-        return False
+        return result.rowcount > 0
     
     async def deactivate_all_profiles(self):
         """Deactivate all profiles"""
-        result = await self.db.execute(select(APIProfile))
-        profiles = result.scalars().all()
-        
-        for profile in profiles:
-            profile.is_active = False
-        
+        await self.db.execute(
+            update(APIProfile)
+            .where(APIProfile.is_active == True)
+            .values(is_active=False)
+            .execution_options(synchronize_session=False)
+        )
         await self.db.commit()
+        profile_cache.invalidate()
     
     async def login_profile(self, profile_id: int) -> Dict[str, Any]:
         """Attempt to login with a profile's auth token using the exact curl request format"""
-        result = await self.db.execute(
-            select(APIProfile).where(APIProfile.id == profile_id)
-        )
-        profile = result.scalar_one_or_none()
+        # Reuses the instance already in the session after create/update
+        profile = await self.db.get(APIProfile, profile_id)
         
         if not profile:
             return {"success": False, "message": "Profile not found"}
@@ -114,100 +123,96 @@ class ProfileService:
             # Data payload with the auth token
             data = {"authToken": profile.auth_token}
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    self.login_url,
-                    headers=headers,
-                    cookies=cookies,
-                    json=data
-                )
-                
-                # Update profile with login attempt
-                profile.last_login_attempt = datetime.utcnow()
-                
-                if response.status_code == 200:
-                    try:
-                        response_data = response.json()
+            response = await self.client.post(
+                self.login_url,
+                headers=headers,
+                cookies=cookies,
+                json=data
+            )
+            
+            # Update profile with login attempt
+            profile.last_login_attempt = datetime.utcnow()
+            
+            if response.status_code == 200:
+                try:
+                    response_data = orjson.loads(response.content)
+                    
+                    if response_data.get("code") == 200 and response_data.get("message") == "Login successful":
+                        # Successful login - save all the response data
+                        data_section = response_data.get("data", {})
                         
-                        if response_data.get("code") == 200 and response_data.get("message") == "Login successful":
-                            # Successful login - save all the response data
-                            data_section = response_data.get("data", {})
-                            
-                            profile.is_logged_in = True
-                            profile.login_status = "success"
-                            profile.username = data_section.get("username")
-                            profile.email = data_section.get("email")
-                            
-                            # Store the session token from the response (this is what we use for API calls)
-                            profile.session_token = data_section.get("authToken", profile.auth_token)
-                            
-                            # Parse session expires if available
-                            session_expires_str = data_section.get("sessionExpires")
-                            if session_expires_str:
-                                try:
-                                    profile.session_expires = datetime.strptime(
-                                        session_expires_str, "%Y-%m-%d %H:%M:%S"
-                                    )
-                                except ValueError:
-                                    # Try alternative format if needed
-                                    try:
-                                        profile.session_expires = datetime.fromisoformat(
-                                            session_expires_str.replace(" ", "T")
-                                        )
-                                    except ValueError:
-                                        pass
-                            
-                            await self.db.commit()
-                            
-                            return {
-                                "success": True,
-                                "message": "Login successful",
-                                "profile_data": {
-                                    "username": profile.username,
-                                    "email": profile.email,
-                                    "session_expires": session_expires_str,
-                                    "full_response": response_data  # Save full response for debugging
-                                }
-                            }
-                        else:
-                            # Login failed based on response
-                            profile.is_logged_in = False
-                            profile.login_status = "failed"
-                            await self.db.commit()
-                            
-                            return {
-                                "success": False,
-                                "message": response_data.get("message", "Login failed"),
-                                "response_data": response_data
+                        profile.is_logged_in = True
+                        profile.login_status = "success"
+                        profile.username = data_section.get("username")
+                        profile.email = data_section.get("email")
+                        
+                        # Store the session token from the response (this is what we use for API calls)
+                        profile.session_token = data_section.get("authToken", profile.auth_token)
+                        
+                        # Parse session expires if available
+                        session_expires_str = data_section.get("sessionExpires")
+                        if session_expires_str:
+                            # fromisoformat accepts "YYYY-MM-DD HH:MM:SS" and ISO variants (Python 3.11+)
+                            try:
+                                profile.session_expires = datetime.fromisoformat(session_expires_str)
+                            except ValueError:
+                                pass
+                        
+                        await self.db.commit()
+                        profile_cache.invalidate()
+                        
+                        return {
+                            "success": True,
+                            "message": "Login successful",
+                            "profile_data": {
+                                "username": profile.username,
+                                "email": profile.email,
+                                "session_expires": session_expires_str
                             }
-                    except Exception as json_error:
-                        # JSON parsing error
+                        }
+                    else:
+                        # Login failed based on response
                         profile.is_logged_in = False
                         profile.login_status = "failed"
                         await self.db.commit()
+                        profile_cache.invalidate()
                         
                         return {
                             "success": False,
-                            "message": f"Invalid JSON response: {str(json_error)}",
-                            "raw_response": response.text
+                            "message": response_data.get("message", "Login failed"),
+                            "response_data": response_data
                         }
-                else:
-                    # HTTP error
+                except Exception as json_error:
+                    # JSON parsing error
                     profile.is_logged_in = False
                     profile.login_status = "failed"
                     await self.db.commit()
+                    profile_cache.invalidate()
                     
                     return {
                         "success": False,
-                        "message": f"HTTP Error {response.status_code}",
-                        "response_text": response.text
+                        "message": f"Invalid JSON response: {str(json_error)}",
+                        "raw_response": _body_excerpt(response)
                     }
-                    
+            else:
+                # HTTP error
+                profile.is_logged_in = False
+                profile.login_status = "failed"
+                await self.db.commit()
+                profile_cache.invalidate()
+                
+                return {
+                    "success": False,
+                    "message": f"HTTP Error {response.status_code}",
+                    "response_text": _body_excerpt(response)
+                }
+                
         except Exception as e:
             # Exception occurred
             profile.is_logged_in = False
             profile.login_status = "failed"
             await self.db.commit()
+            profile_cache.invalidate()
             
             return {
                 "success": False,
@@ -217,20 +222,36 @@ class ProfileService:
     async def delete_profile(self, profile_id: int) -> bool:
         """Delete a profile"""
         result = await self.db.execute(
-            select(APIProfile).where(APIProfile.id == profile_id)
+            delete(APIProfile).where(APIProfile.id == profile_id)
         )
-        profile = result.scalar_one_or_none()
         
-        if profile:
-            await self.db.delete(profile)
-            await self.db.commit()
-            return True
+        if result.rowcount == 0:
+            return False
         
-        return False
+        await self.db.commit()
+        profile_cache.invalidate()
+        return True
     
-    async def get_active_profile_config(self) -> Optional[Dict[str, Any]]:
+    async def get_active_profile_config(self) -> Optional[Mapping[str, Any]]:
         """Get the configuration for the active profile for API calls"""
-        active_profile = await self.get_active_profile()
+        return await profile_cache.get(self._load_active_profile_config)
+    
+    async def _load_active_profile_config(self) -> Optional[Dict[str, Any]]:
+        """Build the active profile's API configuration from the database"""
+        # Only the columns the API config uses; full rows are never needed here
+        result = await self.db.execute(
+            select(
+                APIProfile.auth_token,
+                APIProfile.session_token,
+                APIProfile.username,
+                APIProfile.email,
+                APIProfile.session_expires,
+                APIProfile.is_logged_in
+            )
+            .where(APIProfile.is_active == True)
+            .limit(1)
+        )
+        active_profile = result.first()
         
         if not active_profile or not active_profile.is_logged_in:
             return None
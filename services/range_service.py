@@ -1,7 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from database import dialect_insert
 from models import NumberRange
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 class RangeService:
     """Service for managing number ranges"""
@@ -11,49 +12,43 @@ class RangeService:
     
     async def get_ranges_by_category(self) -> Dict[str, List[str]]:
         """Get all ranges grouped by category"""
-        result = await self.db.execute(
-            select(NumberRange).order_by(NumberRange.updated_at.desc())
-        )
-        ranges = result.scalars().all()
-        
         grouped = {
             "favorites": [],
             "recents": [],
             "special": []
         }
         
-        for range_obj in ranges:
-            if range_obj.category in grouped:
-                grouped[range_obj.category].append(range_obj.range_value)
+        # Only the two grouped columns are needed; skip ORM instances entirely
+        result = await self.db.execute(
+            select(NumberRange.category, NumberRange.range_value)
+            .where(NumberRange.category.in_(tuple(grouped)))
+            .order_by(NumberRange.updated_at.desc())
+        )
+        
+        for category, range_value in result:
+            grouped[category].append(range_value)
         
         return grouped
     
+    async def insert_range(
+        self, range_value: str, category: str, extra_data: Optional[dict] = None
+    ) -> Optional[NumberRange]:
+        """Insert a range, returning None if it already exists in the category"""
+        # Relies on uq_range_value_category, which init_db ensures on startup
+        result = await self.db.execute(
+            dialect_insert(NumberRange)
+            .values(range_value=range_value, category=category, extra_data=extra_data)
+            .on_conflict_do_nothing(index_elements=["range_value", "category"])
+            .returning(NumberRange)
+        )
+        return result.scalar_one_or_none()
+    
     async def add_to_category(self, range_value: str, category: str, extra_data: dict = None):
         """Add range to specific category"""
-        # Check if already exists
-        existing = await self.db.execute(
-            select(NumberRange).where(
-                NumberRange.range_value == range_value,
-                NumberRange.category == category
-            )
-        )
-        
-        if existing.scalar_one_or_none():
+        new_range = await self.insert_range(range_value, category, extra_data or {})
+        if new_range is None:
             return False  # Already exists
         
-        # Remove from other categories if exists
-        await self.db.execute(
-            select(NumberRange).where(NumberRange.range_value == range_value)
-        )
-        
-        # Add to new category
-        new_range = NumberRange(
-            range_value=range_value,
-            category=category,
-            extra_data=extra_data or {}
-        )
-        
-        self.db.add(new_range)
         await self.db.commit()
         
         return True
@@ -83,4 +78,14 @@ class RangeService:
             .order_by(NumberRange.updated_at.desc())
         )
         
+        return result.scalars().all()
+    
+    async def get_category_range_values(self, category: str) -> List[str]:
+        """Get the range values for a specific category, newest first"""
+        result = await self.db.execute(
+            select(NumberRange.range_value)
+            .where(NumberRange.category == category)
+            .order_by(NumberRange.updated_at.desc())
+        )
+        
         return result.scalars().all()
\ No newline at end of file
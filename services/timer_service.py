@@ -1,9 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
+from database import dialect_insert
 from models import Configuration
 from typing import Dict, Any
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 class TimerService:
     """Service for managing automation timers"""
@@ -12,6 +13,16 @@ class TimerService:
         self.db = db
         self.active_timers = {}
     
+    async def _upsert_config(self, key: str, value: Dict[str, Any]):
+        """Insert or overwrite a configuration row; the caller commits"""
+        stmt = dialect_insert(Configuration).values(key=key, value=value)
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={"value": stmt.excluded.value, "updated_at": func.now()}
+            )
+        )
+    
     async def get_status(self) -> Dict[str, Any]:
         """Get current timer status"""
         # Get timer configuration from database
@@ -38,26 +49,17 @@ class TimerService:
             await self.stop_timer(category)
             
             # Update timer status in database
+            now = datetime.now(timezone.utc)
             timer_status = {
                 "active": True,
                 "category": category,
                 "interval_minutes": interval_minutes,
-                "started_at": datetime.utcnow().isoformat(),
-                "next_cycle": (datetime.utcnow() + timedelta(minutes=interval_minutes)).isoformat()
+                "started_at": now.isoformat(),
+                "next_cycle": (now + timedelta(minutes=interval_minutes)).isoformat()
             }
             
             # Save to database
-            result = await self.db.execute(
-                select(Configuration).where(Configuration.key == "timer_status")
-            )
-            config = result.scalar_one_or_none()
-            
-            if config:
-                config.value = timer_status
-            else:
-                config = Configuration(key="timer_status", value=timer_status)
-                self.db.add(config)
-            
+            await self._upsert_config("timer_status", timer_status)
             await self.db.commit()
             
             return {"success": True, "message": f"Timer started for {category}"}
@@ -73,21 +75,11 @@ class TimerService:
                 "active": False,
                 "category": None,
                 "interval_minutes": 0,
-                "stopped_at": datetime.utcnow().isoformat()
+                "stopped_at": datetime.now(timezone.utc).isoformat()
             }
             
             # Save to database
-            result = await self.db.execute(
-                select(Configuration).where(Configuration.key == "timer_status")
-            )
-            config = result.scalar_one_or_none()
-            
-            if config:
-                config.value = timer_status
-            else:
-                config = Configuration(key="timer_status", value=timer_status)
-                self.db.add(config)
-            
+            await self._upsert_config("timer_status", timer_status)
             await self.db.commit()
             
             return {"success": True, "message": f"Timer stopped for {category}"}
@@ -100,18 +92,18 @@ class TimerService:
         from services.range_service import RangeService
         
         range_service = RangeService(self.db)
-        ranges = await range_service.get_category_ranges(category)
+        ranges = await range_service.get_category_range_values(category)
         
         if not ranges:
             return None
         
         # Get current index from configuration
         result = await self.db.execute(
-            select(Configuration).where(Configuration.key == f"{category}_cycle_index")
+            select(Configuration.value).where(Configuration.key == f"{category}_cycle_index")
         )
-        config = result.scalar_one_or_none()
+        index_value = result.scalar_one_or_none()
         
-        current_index = config.value.get("index", 0) if config else 0
+        current_index = index_value.get("index", 0) if index_value else 0
         
         # Get next range
         if current_index >= len(ranges):
@@ -119,42 +111,27 @@ class TimerService:
         
         current_range = ranges[current_index]
         
+        # One timestamp for both rows written by this cycle
+        now_iso = datetime.now(timezone.utc).isoformat()
+        
         # Update current range configuration
         current_config = {
-            "current_range": current_range.range_value,
+            "current_range": current_range,
             "category": category,
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": now_iso
         }
         
         # Save current range
-        result = await self.db.execute(
-            select(Configuration).where(Configuration.key == "current_range")
-        )
-        config = result.scalar_one_or_none()
-        
-        if config:
-            config.value = current_config
-        else:
-            config = Configuration(key="current_range", value=current_config)
-            self.db.add(config)
+        await self._upsert_config("current_range", current_config)
         
         # Update cycle index
         index_config = {
             "index": current_index + 1,
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": now_iso
         }
         
-        result = await self.db.execute(
-            select(Configuration).where(Configuration.key == f"{category}_cycle_index")
-        )
-        config = result.scalar_one_or_none()
-        
-        if config:
-            config.value = index_config
-        else:
-            config = Configuration(key=f"{category}_cycle_index", value=index_config)
-            self.db.add(config)
+        await self._upsert_config(f"{category}_cycle_index", index_config)
         
         await self.db.commit()
         
-        return current_range.range_value
\ No newline at end of file
+        return current_range
\ No newline at end of file